@@ -1,17 +1,28 @@
 
 import os
 import re
+import selectors
+import atexit
+import queue
 import sys
 import ast
 import uuid
 import shutil
+import signal
 import tempfile
 import logging
-import json
+import marshal
+import hashlib
+import importlib.metadata
+import importlib.util
 import subprocess
-import traceback
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
+import orjson
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -24,11 +35,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger('xmrt-python-exec')
 
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for jsonify() and request.get_json()."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response; skip the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
-# In-memory session store: session_id -> { id, work_dir, created_at, cell_count }
-sessions: dict = {}
+# In-memory session store: session_id -> { id, work_dir, created_at, cell_count, last_used }
+# Kept in least-recently-used order and bounded by MAX_SESSIONS / SESSION_TTL_SEC.
+sessions: OrderedDict = OrderedDict()
+sessions_lock = threading.RLock()
+
+# Maximum number of live sessions; the least recently used is evicted beyond this.
+MAX_SESSIONS = 512
+
+# Sessions idle longer than this (seconds) are evicted with their working dir.
+SESSION_TTL_SEC = 3600
 
 # Maximum stdout/stderr captured per execution (2 MB). Prevents memory exhaustion.
 MAX_OUTPUT_BYTES = 2 * 1024 * 1024  # 2 MB
@@ -36,6 +72,9 @@ MAX_OUTPUT_BYTES = 2 * 1024 * 1024  # 2 MB
 # Maximum execution timeout (seconds). Hard cap regardless of caller request.
 MAX_TIMEOUT_SEC = 120
 
+# Interpreter version reported in every response, e.g. "3.11.7".
+PY_VERSION_SHORT = sys.version.split()[0]
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Security: Import Blocklist
 # ─────────────────────────────────────────────────────────────────────────────
@@ -76,7 +115,45 @@ BLOCKED_PATTERNS = [
     r'locals\s*\(\s*\)',
 ]
 
-COMPILED_BLOCKED_PATTERNS = [re.compile(p) for p in BLOCKED_PATTERNS]
+# All patterns fused into one alternation so the code is scanned once. Each
+# alternative is a named group (p0, p1, ...) mapping back to BLOCKED_PATTERNS.
+BLOCKED_RE = re.compile('|'.join(f'(?P<p{i}>{p})' for i, p in enumerate(BLOCKED_PATTERNS)))
+
+
+# Memoized security_check verdicts: blake2b(code) digest -> (is_safe, reason).
+# Agents often resubmit identical cells; the blocklist is static, so a verdict
+# never goes stale within a process.
+SECURITY_CACHE_SIZE = 1024
+_security_cache: OrderedDict = OrderedDict()
+_security_cache_lock = threading.Lock()
+
+
+class _BlockedImport(Exception):
+    """Raised by _ImportScanner to stop at the first forbidden import."""
+
+
+class _ImportScanner(ast.NodeVisitor):
+    """
+    Walks only statement nodes looking for blocked imports. Imports are
+    statements and cannot appear inside expressions, so expression subtrees
+    (arithmetic, calls, literals, ...) are never visited.
+    """
+
+    _STATEMENT_NODES = (ast.stmt, ast.excepthandler, ast.match_case)
+
+    def generic_visit(self, node):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, self._STATEMENT_NODES):
+                self.visit(child)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.name.split('.')[0] in BLOCKED_MODULES:
+                raise _BlockedImport(f"Security: import of '{alias.name}' is not permitted")
+
+    def visit_ImportFrom(self, node):
+        if (node.module or '').split('.')[0] in BLOCKED_MODULES:
+            raise _BlockedImport(f"Security: 'from {node.module} import ...' is not permitted")
 
 
 def security_check(code: str) -> tuple[bool, str]:
@@ -85,29 +162,44 @@ def security_check(code: str) -> tuple[bool, str]:
     1. AST-based import analysis (catches `import X` and `from X import Y`)
     2. Regex pattern scan for dangerous attribute access
 
+    Results are cached by code digest (LRU, SECURITY_CACHE_SIZE entries).
+
     Returns: (is_safe: bool, reason: str)
     """
-    # Pass 1: AST import analysis
-    try:
-        tree = ast.parse(code)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    top_module = alias.name.split('.')[0]
-                    if top_module in BLOCKED_MODULES:
-                        return False, f"Security: import of '{alias.name}' is not permitted"
-            elif isinstance(node, ast.ImportFrom):
-                top_module = (node.module or '').split('.')[0]
-                if top_module in BLOCKED_MODULES:
-                    return False, f"Security: 'from {node.module} import ...' is not permitted"
-    except SyntaxError as e:
-        # Let the interpreter report the actual syntax error; don't block it here
-        logger.debug(f"AST parse failed (syntax error, letting interpreter handle): {e}")
+    key = hashlib.blake2b(code.encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+    with _security_cache_lock:
+        verdict = _security_cache.get(key)
+        if verdict is not None:
+            _security_cache.move_to_end(key)
+            return verdict
+
+    verdict = _scan_code(code)
+    with _security_cache_lock:
+        _security_cache[key] = verdict
+        if len(_security_cache) > SECURITY_CACHE_SIZE:
+            _security_cache.popitem(last=False)
+    return verdict
+
+
+def _scan_code(code: str) -> tuple[bool, str]:
+    """Uncached body of security_check."""
+    # Pass 1: AST import analysis. Every import statement contains the literal
+    # keyword `import` (keywords are not NFKC-normalized, and __import__ is
+    # caught by pass 2), so code without it cannot import and skips the parse.
+    if 'import' in code:
+        try:
+            _ImportScanner().visit(ast.parse(code))
+        except _BlockedImport as e:
+            return False, str(e)
+        except SyntaxError as e:
+            # Let the interpreter report the actual syntax error; don't block it here
+            logger.debug("AST parse failed (syntax error, letting interpreter handle): %s", e)
 
     # Pass 2: Regex pattern scan
-    for pattern in COMPILED_BLOCKED_PATTERNS:
-        if pattern.search(code):
-            return False, f"Security: pattern '{pattern.pattern[:60]}' is not permitted"
+    match = BLOCKED_RE.search(code)
+    if match:
+        pattern = BLOCKED_PATTERNS[int(match.lastgroup[1:])]
+        return False, f"Security: pattern '{pattern[:60]}' is not permitted"
 
     return True, ""
 
@@ -116,34 +208,444 @@ def security_check(code: str) -> tuple[bool, str]:
 # Session Management
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _remove_work_dirs(work_dirs: list):
+    """Remove session working directories (called outside sessions_lock)."""
+    for work_dir in work_dirs:
+        if work_dir and os.path.exists(work_dir):
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _pop_evictable_sessions() -> list:
+    """
+    Drop sessions that are idle past SESSION_TTL_SEC or beyond MAX_SESSIONS,
+    oldest first. Caller must hold sessions_lock. Returns their work dirs.
+    """
+    cutoff = time.monotonic() - SESSION_TTL_SEC
+    work_dirs = []
+    while sessions:
+        session_id, session = next(iter(sessions.items()))
+        if session["last_used"] > cutoff and len(sessions) <= MAX_SESSIONS:
+            break
+        del sessions[session_id]
+        work_dirs.append(session["work_dir"])
+        logger.info("Evicted session %s...", session_id[:8])
+    return work_dirs
+
+
+def expire_sessions():
+    """Evict idle and excess sessions and clean up their working directories."""
+    with sessions_lock:
+        work_dirs = _pop_evictable_sessions()
+    _remove_work_dirs(work_dirs)
+
+
 def get_or_create_session(session_id: str) -> dict:
     """Get existing or create new session with its working directory."""
-    if session_id not in sessions:
-        work_dir = tempfile.mkdtemp(prefix=f"session_{session_id[:8]}_")
-        sessions[session_id] = {
-            "id": session_id,
-            "work_dir": work_dir,
-            "created_at": datetime.utcnow().isoformat(),
-            "cell_count": 0,
-        }
-        logger.info(f"Created session {session_id[:8]}... -> {work_dir}")
-    return sessions[session_id]
+    with sessions_lock:
+        session = sessions.get(session_id)
+        if session is None:
+            work_dir = tempfile.mkdtemp(prefix=f"session_{session_id[:8]}_")
+            session = sessions[session_id] = {
+                "id": session_id,
+                "work_dir": work_dir,
+                "created_at": datetime.utcnow().isoformat(),
+                "cell_count": 0,
+            }
+            logger.info("Created session %s... -> %s", session_id[:8], work_dir)
+        else:
+            sessions.move_to_end(session_id)
+        session["last_used"] = time.monotonic()
+        work_dirs = _pop_evictable_sessions()
+    _remove_work_dirs(work_dirs)
+    return session
 
 
 def cleanup_session(session_id: str):
     """Clean up a session and its working directory."""
-    if session_id in sessions:
-        work_dir = sessions[session_id].get("work_dir")
-        if work_dir and os.path.exists(work_dir):
-            shutil.rmtree(work_dir, ignore_errors=True)
-        del sessions[session_id]
-        logger.info(f"Cleaned up session {session_id[:8]}...")
+    with sessions_lock:
+        session = sessions.pop(session_id, None)
+    if session is not None:
+        _remove_work_dirs([session.get("work_dir")])
+        logger.info("Cleaned up session %s...", session_id[:8])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Stateless Working Directory Pool
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Empty working directories kept for reuse by stateless executions, saving a
+# mkdtemp + rmtree per request.
+EXEC_DIR_POOL_SIZE = 32
+
+_exec_dirs: queue.Queue = queue.Queue()
+_exec_dirs_pid = None  # PID that owns _exec_dirs (reset after a fork)
+_exec_dirs_lock = threading.Lock()
+
+
+def acquire_exec_dir() -> str:
+    """Take an empty working directory from the pool, or create one."""
+    global _exec_dirs, _exec_dirs_pid
+    with _exec_dirs_lock:
+        if _exec_dirs_pid != os.getpid():
+            _exec_dirs = queue.Queue()
+            for _ in range(EXEC_DIR_POOL_SIZE):
+                _exec_dirs.put(tempfile.mkdtemp(prefix="exec_"))
+            _exec_dirs_pid = os.getpid()
+    try:
+        return _exec_dirs.get_nowait()
+    except queue.Empty:
+        return tempfile.mkdtemp(prefix="exec_")
+
+
+def release_exec_dir(work_dir: str):
+    """
+    Return a stateless working directory to the pool. Only directories left
+    empty are reused; anything the code wrote (files, caches) must not leak
+    into the next execution, so those are removed instead.
+    """
+    try:
+        with os.scandir(work_dir) as entries:
+            is_empty = next(entries, None) is None
+    except OSError:
+        return
+    if is_empty and _exec_dirs.qsize() < EXEC_DIR_POOL_SIZE:
+        _exec_dirs.put(work_dir)
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+@atexit.register
+def _shutdown_exec_dirs():
+    """Remove pooled working directories when the service exits."""
+    if _exec_dirs_pid != os.getpid():
+        return
+    while True:
+        try:
+            work_dir = _exec_dirs.get_nowait()
+        except queue.Empty:
+            break
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Interpreter Pool
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Chunk size for pipe reads and the Popen buffer; matches the default Linux
+# pipe capacity so user-space and kernel buffers line up.
+PIPE_READ_CHUNK = 64 * 1024
+
+# Idle interpreters kept pre-spawned so /execute skips interpreter startup.
+INTERPRETER_POOL_SIZE = int(os.environ.get('INTERPRETER_POOL_SIZE', os.cpu_count() or 2))
+
+# Bootstrap run by every pooled interpreter. It starts its own session (so a
+# timeout can kill the whole process group), blocks until run_code writes an
+# 8-byte big-endian length and that many bytes of JSON header to stdin,
+# applies the per-request cwd / env / sys.path, then runs the code as
+# __main__. If the header announces `compiled_len`, that many bytes of
+# marshalled code object follow the header and are executed without
+# recompiling; otherwise the source in the header is compiled. The code never
+# touches disk; `filename` is only used for __file__ and tracebacks (seeded
+# into linecache). Anything after that is user stdin, so the control data is
+# read from fd 0 with exact-length os.read calls: sys.stdin's buffer would
+# read ahead and swallow user bytes that code reading fd 0 directly expects.
+# Interpreters are single-use: one execution, then the process exits, so no
+# state can leak between executions.
+_INTERPRETER_BOOTSTRAP = r'''
+import json, linecache, marshal, os, sys, traceback, types
+os.setsid()
+def _read_exact(n):
+    buf = b""
+    while len(buf) < n:
+        chunk = os.read(0, n - len(buf))
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+_prefix = _read_exact(8)
+if len(_prefix) < 8:
+    sys.exit(0)
+_req = json.loads(_read_exact(int.from_bytes(_prefix, "big")))
+os.chdir(_req["work_dir"])
+os.environ.update(_req["env"])
+sys.path[0] = _req["work_dir"]
+_compiled = _read_exact(_req["compiled_len"]) if _req["compiled_len"] else None
+_filename = _req["filename"]
+linecache.cache[_filename] = (len(_req["code"]), None, _req["code"].splitlines(True), _filename)
+_main = types.ModuleType("__main__")
+_main.__file__ = os.path.join(_req["work_dir"], _filename)
+sys.modules["__main__"] = _main
+sys.argv = [_main.__file__]
+try:
+    if _compiled:
+        _code = marshal.loads(_compiled)
+    else:
+        _code = compile(_req["code"], _filename, "exec")
+    exec(_code, _main.__dict__)
+except SystemExit:
+    raise
+except BaseException as _e:
+    # Hide the bootstrap frame so tracebacks look like a plain script run
+    _tb = _e.__traceback__
+    while _tb is not None and _tb.tb_frame.f_code.co_filename != _filename:
+        _tb = _tb.tb_next
+    traceback.print_exception(type(_e), _e, _tb)
+    sys.exit(1)
+'''
+
+_idle_interpreters: queue.Queue = queue.Queue()
+_pool_pid = None  # PID that owns _idle_interpreters (reset after a fork)
+_pool_lock = threading.Lock()
+_refill_lock = threading.Lock()
+
+
+# Environment template shared by every interpreter, built once at startup with
+# credentials stripped. Per-request keys are applied by the bootstrap.
+BASE_ENV = {
+    k: v for k, v in os.environ.items()
+    if k not in ('SUPABASE_SERVICE_ROLE_KEY', 'SUPABASE_URL')
+}
+
+
+def _spawn_interpreter() -> subprocess.Popen:
+    """
+    Start a bootstrap interpreter that waits for its execution request.
+
+    The arguments are chosen so CPython launches it with posix_spawn instead
+    of fork + exec, avoiding a page-table copy of this large parent process:
+    absolute executable, no cwd, no preexec_fn and close_fds=False (fds are
+    non-inheritable by default, so only the stdio pipes reach the child).
+    start_new_session would disable posix_spawn; the bootstrap calls
+    os.setsid() itself instead.
+    """
+    return subprocess.Popen(
+        [sys.executable, '-c', _INTERPRETER_BOOTSTRAP],
+        executable=sys.executable,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=BASE_ENV,
+        bufsize=PIPE_READ_CHUNK,
+        close_fds=False,
+    )
+
+
+def kill_interpreter(process: subprocess.Popen):
+    """Kill an interpreter and anything it spawned (its process group)."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass  # Bootstrap has not called setsid() yet, or already gone
+    process.kill()
+
+
+def _refill_pool():
+    """Top the idle pool back up to INTERPRETER_POOL_SIZE (one refiller at a time)."""
+    if not _refill_lock.acquire(blocking=False):
+        return
+    try:
+        while _idle_interpreters.qsize() < INTERPRETER_POOL_SIZE:
+            _idle_interpreters.put(_spawn_interpreter())
+    except Exception as e:
+        logger.warning("Interpreter pool refill failed: %s", e)
+    finally:
+        _refill_lock.release()
+
+
+def acquire_interpreter() -> subprocess.Popen:
+    """
+    Take a pre-spawned idle interpreter, spawning one directly if the pool is
+    empty, and schedule a background refill.
+    """
+    global _idle_interpreters, _pool_pid
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            # First use in this process (or a forked worker): start a fresh pool
+            _idle_interpreters = queue.Queue()
+            _pool_pid = os.getpid()
+
+    process = None
+    while process is None:
+        try:
+            process = _idle_interpreters.get_nowait()
+        except queue.Empty:
+            process = _spawn_interpreter()
+        else:
+            if process.poll() is not None:
+                process = None  # Died while idle; discard it
+
+    threading.Thread(target=_refill_pool, daemon=True).start()
+    return process
+
+
+@atexit.register
+def _shutdown_pool():
+    """Kill idle interpreters when the service exits."""
+    while True:
+        try:
+            process = _idle_interpreters.get_nowait()
+        except queue.Empty:
+            break
+        process.kill()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Core Execution
 # ─────────────────────────────────────────────────────────────────────────────
 
+
+# Pre-compiled cells: blake2b(code) digest -> (filename, marshalled code object).
+# Cells or code objects over COMPILE_CACHE_MAX_BYTES are left to the child to
+# compile, so the cache holds at most COMPILE_CACHE_SIZE small entries.
+COMPILE_CACHE_SIZE = 256
+COMPILE_CACHE_MAX_BYTES = 64 * 1024
+_compile_cache: OrderedDict = OrderedDict()
+_compile_cache_lock = threading.Lock()
+
+# Digests of cells seen once. A cell is only compiled here when it comes back,
+# so one-off cells cost a hash on the request thread and compile in the child.
+COMPILE_SEEN_SIZE = 4096
+_compile_seen: OrderedDict = OrderedDict()
+
+# Compile-time warnings must reach the user, but they can't be captured here:
+# the warnings filter list is process-global and this runs on request threads.
+# Instead, a broad lexical screen sends cells that might warn at compile time
+# to the child, which reports the warnings itself. A false positive only costs
+# the pre-compile.
+_MAY_WARN_RE = re.compile(
+    r'\\(?![\\\'"abfnrtv0-3x\r\n])'                              # escape that can be invalid
+    r'|\b(?:is|assert)\b'                                        # `is` with a literal, assert on a tuple
+    r'|\b\d[\w.]*(?:and|else|for|if|in|is|not|or)'               # number glued to a keyword
+    r'|(?:[)\]}\'".]|\b\d[\w.]*|\b(?:None|True|False))\s*[(\[]'  # literal called or subscripted
+)
+
+
+def compile_cell(code: str) -> tuple[str, bytes]:
+    """
+    Compile a repeated cell once and return (filename, marshalled code object)
+    for the interpreter bootstrap, so later runs skip parsing in the child.
+    Pooled interpreters run the same sys.executable, so the marshal format
+    matches.
+
+    The filename is relative and derived from the code digest, so a cached code
+    object is valid in any working directory. Cells seen for the first time,
+    cells that fail to compile, might emit compile-time warnings, or are too
+    large to cache return b'' and are compiled by the child, which reports
+    those diagnostics to the user as before.
+    """
+    data = code.encode('utf-8', errors='surrogatepass')
+    key = hashlib.blake2b(data, digest_size=16).digest()
+    filename = f"script_{key.hex()[:8]}.py"
+    if len(data) > COMPILE_CACHE_MAX_BYTES:
+        return filename, b''
+
+    with _compile_cache_lock:
+        entry = _compile_cache.get(key)
+        if entry is not None:
+            _compile_cache.move_to_end(key)
+            return entry
+        if _compile_seen.pop(key, None) is None:
+            _compile_seen[key] = True
+            if len(_compile_seen) > COMPILE_SEEN_SIZE:
+                _compile_seen.popitem(last=False)
+            return filename, b''
+
+    compiled = b''
+    if not _MAY_WARN_RE.search(code):
+        try:
+            compiled = marshal.dumps(compile(code, filename, 'exec', dont_inherit=True))
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            pass
+        if len(compiled) > COMPILE_CACHE_MAX_BYTES:
+            compiled = b''
+
+    entry = (filename, compiled)
+    with _compile_cache_lock:
+        _compile_cache[key] = entry
+        if len(_compile_cache) > COMPILE_CACHE_SIZE:
+            _compile_cache.popitem(last=False)
+    return entry
+
+
+# After a timeout kill, how long (seconds) to keep draining before giving up on
+# pipes still held open by an escaped grandchild.
+KILL_GRACE_SEC = 1.0
+
+
+def _communicate_capped(
+    process: subprocess.Popen,
+    input_data: bytes,
+    timeout_sec: float,
+) -> tuple[bytearray, bytearray, bool]:
+    """
+    Feed `input_data` to the child's stdin and drain stdout/stderr with a
+    single selector loop over nonblocking pipes (no reader threads). Each
+    output buffer keeps at most MAX_OUTPUT_BYTES + 1 bytes; the extra byte
+    lets the caller tell "exactly at the cap" from "truncated". Once a stream
+    passes the cap its read end is closed, so the child's next write to it
+    fails with EPIPE instead of burning CPU on output that would be dropped.
+
+    Returns: (stdout_buf, stderr_buf, timed_out)
+    """
+    stdout_fd, stderr_fd = process.stdout.fileno(), process.stderr.fileno()
+    stdin_fd = process.stdin.fileno()
+    pipes = {stdin_fd: process.stdin, stdout_fd: process.stdout, stderr_fd: process.stderr}
+    bufs = {stdout_fd: bytearray(), stderr_fd: bytearray()}
+    pending = memoryview(input_data)
+    timed_out = False
+    deadline = time.monotonic() + timeout_sec
+
+    for fd in pipes:
+        os.set_blocking(fd, False)
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(stdout_fd, selectors.EVENT_READ)
+        selector.register(stderr_fd, selectors.EVENT_READ)
+        selector.register(stdin_fd, selectors.EVENT_WRITE)
+        try:
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    if timed_out:
+                        break  # Grace period over; stop waiting on stray pipe holders
+                    timed_out = True
+                    kill_interpreter(process)
+                    deadline = time.monotonic() + KILL_GRACE_SEC
+                    continue
+
+                for key, _ in selector.select(remaining):
+                    if key.fd == stdin_fd:
+                        try:
+                            written = os.write(stdin_fd, pending[:PIPE_READ_CHUNK])
+                            pending = pending[written:]
+                        except BlockingIOError:
+                            continue
+                        except BrokenPipeError:
+                            pending = pending[:0]  # Child exited without reading stdin
+                        if not pending:
+                            selector.unregister(stdin_fd)
+                            process.stdin.close()
+                        continue
+
+                    try:
+                        chunk = os.read(key.fd, PIPE_READ_CHUNK)
+                    except BlockingIOError:
+                        continue
+                    buf = bufs[key.fd]
+                    buf += chunk[:MAX_OUTPUT_BYTES + 1 - len(buf)]
+                    if not chunk or len(buf) > MAX_OUTPUT_BYTES:
+                        selector.unregister(key.fd)
+                        pipes[key.fd].close()
+        finally:
+            for pipe in pipes.values():
+                try:
+                    pipe.close()
+                except BrokenPipeError:
+                    pass
+
+    return bufs[stdout_fd], bufs[stderr_fd], timed_out
+
+
 def run_code(
     code: str,
     stdin: str = '',
@@ -152,97 +654,149 @@ def run_code(
     stateless: bool = True,
 ) -> dict:
     """
-    Execute Python code in a subprocess with resource constraints.
+    Execute Python code in a pooled, single-use interpreter subprocess with
+    resource constraints.
 
     Returns: { stdout, stderr, exit_code }
     """
     own_dir = False
     if work_dir is None:
-        work_dir = tempfile.mkdtemp(prefix="exec_")
+        work_dir = acquire_exec_dir()
         own_dir = True
 
-    script_path = os.path.join(work_dir, f"script_{uuid.uuid4().hex[:8]}.py")
     try:
-        with open(script_path, 'w', encoding='utf-8') as f:
-            f.write(code)
-
-        env = os.environ.copy()
-        env['PYTHONPATH'] = work_dir + os.pathsep + env.get('PYTHONPATH', '')
-        # Isolate matplotlib temp dir to work_dir
-        env['MPLCONFIGDIR'] = work_dir
-        env['HOME'] = work_dir  # Prevent writes to /app by libraries
-        # Strip credentials from subprocess environment
-        for key in ('SUPABASE_SERVICE_ROLE_KEY', 'SUPABASE_URL'):
-            env.pop(key, None)
-
-        process = subprocess.Popen(
-            [sys.executable, script_path],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=work_dir,
-            env=env,
-            text=True,
+        env = {
+            'PYTHONPATH': work_dir + os.pathsep + BASE_ENV.get('PYTHONPATH', ''),
+            # Isolate matplotlib temp dir to work_dir
+            'MPLCONFIGDIR': work_dir,
+            'HOME': work_dir,  # Prevent writes to /app by libraries
+        }
+        filename, compiled = compile_cell(code)
+        header = orjson.dumps({
+            "work_dir": work_dir,
+            "filename": filename,
+            "code": code,
+            "compiled_len": len(compiled),
+            "env": env,
+        })
+
+        process = acquire_interpreter()
+        deadline = time.monotonic() + timeout_sec
+
+        stdout_buf, stderr_buf, timed_out = _communicate_capped(
+            process,
+            len(header).to_bytes(8, 'big') + header + compiled + (stdin or '').encode('utf-8'),
+            timeout_sec,
         )
-
+        # The pipe loop ends early if the child closes (or caps) both output
+        # streams, so the timeout still has to cover the rest of its life.
         try:
-            stdout, stderr = process.communicate(input=stdin or '', timeout=timeout_sec)
-            exit_code = process.returncode
+            exit_code = process.wait(timeout=max(0, deadline - time.monotonic()))
         except subprocess.TimeoutExpired:
-            process.kill()
-            stdout, stderr = process.communicate()
-            stderr = (stderr or '') + f"\n⏱️ Execution timed out after {timeout_sec}s"
-            exit_code = 124
+            kill_interpreter(process)
+            timed_out = True
+            exit_code = process.wait()
 
         # Enforce output size limit
-        if len(stdout.encode()) > MAX_OUTPUT_BYTES:
-            stdout = stdout.encode()[:MAX_OUTPUT_BYTES].decode(errors='replace')
+        stdout_truncated = len(stdout_buf) > MAX_OUTPUT_BYTES
+        del stdout_buf[MAX_OUTPUT_BYTES:]
+        del stderr_buf[MAX_OUTPUT_BYTES:]
+
+        stdout = stdout_buf.decode('utf-8', errors='replace')
+        stderr = stderr_buf.decode('utf-8', errors='replace')
+
+        if stdout_truncated:
             stdout += "\n\n⚠️ [TRUNCATED] Output exceeded 2 MB limit."
-        if len(stderr.encode()) > MAX_OUTPUT_BYTES:
-            stderr = stderr.encode()[:MAX_OUTPUT_BYTES].decode(errors='replace')
+        if timed_out:
+            stderr += f"\n⏱️ Execution timed out after {timeout_sec}s"
+            exit_code = 124
 
         return {"stdout": stdout, "stderr": stderr, "exit_code": exit_code}
 
     finally:
-        if os.path.exists(script_path):
-            os.remove(script_path)
         if own_dir and stateless:
-            shutil.rmtree(work_dir, ignore_errors=True)
+            release_exec_dir(work_dir)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Routes
+# Library Inventory
 # ─────────────────────────────────────────────────────────────────────────────
 
-@app.route('/health', methods=['GET'])
-def health():
-    """Health check endpoint — reports status and all installed library versions."""
+# Curated libraries reported by /health.
+CHECK_LIBS = [
+    'requests', 'httpx', 'aiohttp', 'bs4', 'lxml', 'html5lib',
+    'numpy', 'pandas', 'polars', 'scipy', 'pyarrow', 'orjson',
+    'matplotlib', 'seaborn', 'plotly', 'kaleido',
+    'sklearn', 'PIL', 'imageio', 'skimage',
+    'nltk', 'reportlab', 'pypdf2', 'svgwrite',
+    'openpyxl', 'xlrd', 'tabulate', 'pydantic',
+]
+
+
+def probe_libraries() -> dict:
+    """
+    Map each library in CHECK_LIBS to its version, 'installed', or None.
+
+    Uses importlib.util.find_spec plus distribution metadata rather than
+    importing, so no library code runs in (or bloats) the service process.
+    """
+    module_dists = importlib.metadata.packages_distributions()
     lib_status = {}
-    # Check every library in the curated set
-    check_libs = [
-        'requests', 'httpx', 'aiohttp', 'bs4', 'lxml', 'html5lib',
-        'numpy', 'pandas', 'polars', 'scipy', 'pyarrow', 'orjson',
-        'matplotlib', 'seaborn', 'plotly', 'kaleido',
-        'sklearn', 'PIL', 'imageio', 'skimage',
-        'nltk', 'reportlab', 'pypdf2', 'svgwrite',
-        'openpyxl', 'xlrd', 'tabulate', 'pydantic',
-    ]
-    for lib in check_libs:
+    for lib in CHECK_LIBS:
         try:
-            mod = __import__(lib)
-            lib_status[lib] = getattr(mod, '__version__', 'installed')
-        except ImportError:
+            spec = importlib.util.find_spec(lib)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None:
             lib_status[lib] = None
+            continue
+        lib_status[lib] = 'installed'
+        for dist in module_dists.get(lib, ()):
+            try:
+                lib_status[lib] = importlib.metadata.version(dist)
+                break
+            except importlib.metadata.PackageNotFoundError:
+                continue
+    return lib_status
+
+
+def list_installed_packages() -> list:
+    """
+    Installed distributions as [{name, version}], in the same shape and
+    order as `pip list --format=json`, read in-process from package metadata.
+    """
+    packages = {}
+    for dist in importlib.metadata.distributions():
+        name = dist.metadata['Name']
+        # Like pip, the first distribution found on sys.path wins
+        if name and name.lower() not in packages:
+            packages[name.lower()] = {"name": name, "version": dist.version}
+    return sorted(packages.values(), key=lambda p: p["name"].lower())
 
+
+# Libraries are baked into the image at build time (/install was removed), so
+# the inventory cannot change while the process is running. Probe it once.
+LIB_STATUS = probe_libraries()
+INSTALLED_PACKAGES = list_installed_packages()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Routes
+# ─────────────────────────────────────────────────────────────────────────────
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Health check endpoint — reports status and all installed library versions."""
+    expire_sessions()
     return jsonify({
         "status": "ok",
         "service": "xmrt-python-execution-service",
         "version": "v4-secure",
         "python": sys.version,
-        "python_version": sys.version.split()[0],
+        "python_version": PY_VERSION_SHORT,
         "mode": "stateful-sessions",
         "active_sessions": len(sessions),
-        "libraries": lib_status,
+        "libraries": LIB_STATUS,
         "security": {
             "blocked_modules": sorted(BLOCKED_MODULES),
             "max_output_bytes": MAX_OUTPUT_BYTES,
@@ -275,13 +829,13 @@ def delete_session(session_id):
 @app.route('/sessions', methods=['GET'])
 def list_sessions_route():
     """List all active sessions."""
-    return jsonify({
-        "sessions": [
+    expire_sessions()
+    with sessions_lock:
+        active = [
             {"id": s["id"], "created_at": s["created_at"], "cell_count": s["cell_count"]}
             for s in sessions.values()
-        ],
-        "count": len(sessions),
-    }), 200
+        ]
+    return jsonify({"sessions": active, "count": len(active)}), 200
 
 
 @app.route('/execute', methods=['POST'])
@@ -328,12 +882,13 @@ def execute():
         timeout_sec = min(timeout_ms / 1000.0, MAX_TIMEOUT_SEC)
         session_id = data.get('session_id', None)
 
-        logger.info(f"[{exec_id}] Execute request: {len(code)} chars, session={session_id}, timeout={timeout_sec}s")
+        logger.info("[%s] Execute request: %d chars, session=%s, timeout=%ss",
+                    exec_id, len(code), session_id, timeout_sec)
 
         # ── Security check ───────────────────────────────────────────────────
         is_safe, reason = security_check(code)
         if not is_safe:
-            logger.warning(f"[{exec_id}] BLOCKED: {reason}")
+            logger.warning("[%s] BLOCKED: %s", exec_id, reason)
             return jsonify({
                 "run": {
                     "stdout": "",
@@ -341,7 +896,7 @@ def execute():
                     "code": 1,
                 },
                 "language": "python",
-                "version": sys.version.split()[0],
+                "version": PY_VERSION_SHORT,
                 "blocked": True,
                 "reason": reason,
             }), 200  # Return 200 so agents get the guidance, not a generic error
@@ -366,7 +921,8 @@ def execute():
         )
 
         exit_code = result["exit_code"]
-        logger.info(f"[{exec_id}] Done: exit_code={exit_code}, stdout={len(result['stdout'])}b, stderr={len(result['stderr'])}b")
+        logger.info("[%s] Done: exit_code=%s, stdout=%db, stderr=%db",
+                    exec_id, exit_code, len(result['stdout']), len(result['stderr']))
 
         return jsonify({
             "run": {
@@ -375,13 +931,13 @@ def execute():
                 "code": exit_code,
             },
             "language": "python",
-            "version": sys.version.split()[0],
+            "version": PY_VERSION_SHORT,
             "session_id": session_id,
             "exec_id": exec_id,
         }), 200
 
     except Exception as e:
-        logger.error(f"[{exec_id}] Internal error: {e}\n{traceback.format_exc()}")
+        logger.error("[%s] Internal error: %s", exec_id, e, exc_info=True)
         return jsonify({
             "run": {
                 "stdout": "",
@@ -389,22 +945,14 @@ def execute():
                 "code": 1,
             },
             "language": "python",
-            "version": sys.version.split()[0],
+            "version": PY_VERSION_SHORT,
         }), 500
 
 
 @app.route('/packages', methods=['GET'])
 def list_packages():
     """List all installed packages with versions."""
-    try:
-        result = subprocess.run(
-            [sys.executable, '-m', 'pip', 'list', '--format=json'],
-            capture_output=True, text=True, timeout=30
-        )
-        packages = json.loads(result.stdout) if result.returncode == 0 else []
-        return jsonify({"packages": packages, "count": len(packages)}), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return jsonify({"packages": INSTALLED_PACKAGES, "count": len(INSTALLED_PACKAGES)}), 200
 
 
 # NOTE: The /install endpoint has been intentionally REMOVED for security.
@@ -412,6 +960,9 @@ def list_packages():
 # Dynamic package installation at runtime was a critical vulnerability.
 
 
+# Production runs under gunicorn (see Dockerfile):
+#   gunicorn --workers $WEB_CONCURRENCY --worker-class gthread --threads 8 app:app
+# The block below is the threaded Werkzeug server, for local development only.
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 8080))
-    app.run(debug=False, host='0.0.0.0', port=port)
+    app.run(debug=False, host='0.0.0.0', port=port, threaded=True)
@@ -0,0 +1,33 @@
+"""
+pytest wiring for test_service.py, so the integration suite can be sharded
+across pytest-xdist workers:
+
+    pytest -n auto --dist=load test_service.py --url http://localhost:8080
+
+The suite keeps its script-style test() checks; a test function fails when
+any of its checks fail.
+"""
+
+import pytest
+
+import test_service
+
+
+def pytest_addoption(parser):
+    parser.addoption("--url", default="http://localhost:8080", help="Base URL of the service")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def base_url(request):
+    test_service.BASE_URL = request.config.getoption("--url").rstrip("/")
+    return test_service.BASE_URL
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_pyfunc_call(pyfuncitem):
+    already_failed = len(test_service.failures)
+    result = yield
+    new_failures = test_service.failures[already_failed:]
+    if new_failures:
+        pytest.fail("\n".join(new_failures), pytrace=False)
+    return result
@@ -5,47 +5,100 @@ Run against a locally running or deployed instance:
 
     python test_service.py --url http://localhost:8080
     python test_service.py --url https://your-cloud-run-url.run.app
+
+Or in parallel under pytest-xdist (see conftest.py, requirements-dev.txt):
+
+    pytest -n auto --dist=load test_service.py --url http://localhost:8080
 """
 
 import argparse
 import json
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = "http://localhost:8080"
 
+# One pooled, keep-alive session for every call so TCP/TLS handshakes are paid
+# once per connection rather than once per test against HTTPS deployments.
+SESSION = requests.Session()
+SESSION.headers["Connection"] = "keep-alive"
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                       max_retries=Retry(total=2, backoff_factor=0.2))
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
 PASS = "\033[92m✅ PASS\033[0m"
 FAIL = "\033[91m❌ FAIL\033[0m"
 WARN = "\033[93m⚠️  WARN\033[0m"
 
 results = {"passed": 0, "failed": 0}
+results_lock = threading.Lock()
+
+# Parallel tests collect their lines here and write them in one go when the
+# test finishes, so sections from concurrent tests don't interleave.
+_output = threading.local()
+_output_lock = threading.Lock()
+
+# "name — detail" for every failed check; conftest.py turns new entries into
+# pytest failures for the test function that recorded them.
+failures: list = []
+
+
+def say(line: str):
+    lines = getattr(_output, "lines", None)
+    if lines is None:
+        print(line)
+    else:
+        lines.append(line)
 
 
 def test(name: str, condition: bool, detail: str = ""):
     if condition:
-        print(f"  {PASS}  {name}")
-        results["passed"] += 1
+        say(f"  {PASS}  {name}")
     else:
-        print(f"  {FAIL}  {name}" + (f" — {detail}" if detail else ""))
-        results["failed"] += 1
+        say(f"  {FAIL}  {name}" + (f" — {detail}" if detail else ""))
+    with results_lock:
+        if condition:
+            results["passed"] += 1
+        else:
+            results["failed"] += 1
+            failures.append(name + (f" — {detail}" if detail else ""))
+
 
+test.__test__ = False  # Assertion helper, not a pytest test
 
-def run(code: str, **kwargs) -> dict:
+
+def run(code: str, request_timeout: float = 60, **kwargs) -> dict:
     payload = {"language": "python", "version": "3.11",
                 "files": [{"name": "main.py", "content": code}]}
     payload.update(kwargs)
-    r = requests.post(f"{BASE_URL}/execute", json=payload, timeout=60)
+    r = SESSION.post(f"{BASE_URL}/execute", json=payload, timeout=request_timeout)
     return r.json()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Parsed /health responses keyed by base URL: (status_code, json body)
+_health_cache: dict = {}
+
+
+def get_health() -> tuple[int, dict]:
+    """GET /health once per base URL; later calls reuse the parsed response."""
+    if BASE_URL not in _health_cache:
+        r = SESSION.get(f"{BASE_URL}/health", timeout=10)
+        _health_cache[BASE_URL] = (r.status_code, r.json())
+    return _health_cache[BASE_URL]
+
+
 def test_health():
-    print("\n📋 Health Check")
-    r = requests.get(f"{BASE_URL}/health", timeout=10)
-    d = r.json()
-    test("GET /health returns 200", r.status_code == 200)
+    say("\n📋 Health Check")
+    status_code, d = get_health()
+    test("GET /health returns 200", status_code == 200)
     test("status == ok", d.get("status") == "ok")
     test("version field present", "version" in d)
     test("libraries dict present", isinstance(d.get("libraries"), dict))
@@ -53,27 +106,39 @@ def test_health():
     test("not running as root", d.get("security", {}).get("runs_as_root") is False,
          f"runs_as_root={d.get('security', {}).get('runs_as_root')}")
     libs = d.get("libraries", {})
-    for expected in ["requests", "numpy", "pandas", "matplotlib", "PIL", "sklearn"]:
-        test(f"library '{expected}' installed", libs.get(expected) is not None,
-             f"got {libs.get(expected)}")
+    expected = {"requests", "numpy", "pandas", "matplotlib", "PIL", "sklearn"}
+    missing = sorted(k for k in expected if libs.get(k) is None)
+    test("all expected libraries installed", not missing, f"missing={missing}")
 
 
 def test_basic_execution():
-    print("\n🐍 Basic Execution")
+    say("\n🐍 Basic Execution")
     r = run("print('hello world')")
     test("Hello world stdout", r.get("run", {}).get("stdout", "").strip() == "hello world")
     test("Exit code 0", r.get("run", {}).get("code") == 0)
 
 
 def test_stdlib():
-    print("\n📚 Standard Library")
+    say("\n📚 Standard Library")
     r = run("import json, math, datetime, collections\nprint(json.dumps({'pi': math.pi}))")
     test("json/math/datetime imports work", r.get("run", {}).get("code") == 0)
     test("stdout contains pi", "3.14" in r.get("run", {}).get("stdout", ""))
 
 
+def test_stdin():
+    say("\n⌨️  stdin")
+    r = run("print(input())\nprint(input())", stdin="line1\nline2\n")
+    test("input() reads stdin lines", r.get("run", {}).get("stdout", "") == "line1\nline2\n",
+         repr(r.get("run", {}).get("stdout", "")))
+    # Reads fd 0 directly, bypassing sys.stdin's buffer
+    r = run("print(repr(open(0).read()))", stdin="line1\nline2\n")
+    test("open(0).read() sees all of stdin",
+         r.get("run", {}).get("stdout", "").strip() == repr("line1\nline2\n"),
+         repr(r.get("run", {}).get("stdout", "")))
+
+
 def test_pandas():
-    print("\n🐼 pandas")
+    say("\n🐼 pandas")
     code = "import pandas as pd\ndf = pd.DataFrame({'x': [1,2,3]})\nprint(df['x'].sum())"
     r = run(code)
     test("pandas import succeeds", r.get("run", {}).get("code") == 0,
@@ -82,7 +147,7 @@ def test_pandas():
 
 
 def test_numpy():
-    print("\n🔢 numpy")
+    say("\n🔢 numpy")
     code = "import numpy as np\narr = np.array([1,2,3,4])\nprint(arr.mean())"
     r = run(code)
     test("numpy import succeeds", r.get("run", {}).get("code") == 0,
@@ -91,7 +156,7 @@ def test_numpy():
 
 
 def test_requests():
-    print("\n🌐 requests (network)")
+    say("\n🌐 requests (network)")
     code = "import requests\nr = requests.get('https://httpbin.org/get', timeout=10)\nprint(r.status_code)"
     r = run(code, run_timeout=30000)
     test("requests import succeeds", r.get("run", {}).get("code") == 0,
@@ -100,7 +165,7 @@ def test_requests():
 
 
 def test_matplotlib():
-    print("\n📊 matplotlib (headless)")
+    say("\n📊 matplotlib (headless)")
     code = (
         "import matplotlib\nmatplotlib.use('Agg')\nimport matplotlib.pyplot as plt\n"
         "import tempfile, os\n"
@@ -115,7 +180,7 @@ def test_matplotlib():
 
 
 def test_pillow():
-    print("\n🖼️  Pillow (image processing)")
+    say("\n🖼️  Pillow (image processing)")
     code = (
         "from PIL import Image\nimport numpy as np, tempfile, os\n"
         "arr = np.zeros((64,64,3), dtype='uint8')\nimg = Image.fromarray(arr)\n"
@@ -129,7 +194,7 @@ def test_pillow():
 
 
 def test_security_subprocess():
-    print("\n🔒 Security — subprocess import blocked")
+    say("\n🔒 Security — subprocess import blocked")
     code = "import subprocess\nresult = subprocess.run(['ls'], capture_output=True)\nprint(result.stdout)"
     r = run(code)
     stderr = r.get("run", {}).get("stderr", "")
@@ -139,7 +204,7 @@ def test_security_subprocess():
 
 
 def test_security_os_system():
-    print("\n🔒 Security — os.system() call blocked")
+    say("\n🔒 Security — os.system() call blocked")
     code = "import os\nos.system('id')"
     r = run(code)
     stderr = r.get("run", {}).get("stderr", "")
@@ -148,7 +213,7 @@ def test_security_os_system():
 
 
 def test_security_ctypes():
-    print("\n🔒 Security — ctypes import blocked")
+    say("\n🔒 Security — ctypes import blocked")
     code = "import ctypes\nprint(ctypes.CDLL('libc.so.6'))"
     r = run(code)
     stderr = r.get("run", {}).get("stderr", "")
@@ -157,25 +222,33 @@ def test_security_ctypes():
 
 
 def test_timeout():
-    print("\n⏱️  Timeout enforcement")
+    say("\n⏱️  Timeout enforcement")
     code = "import time\ntime.sleep(200)"
-    r = run(code, run_timeout=3000)
+    # Server kills the run after 3s; don't wait the default 60s if it doesn't
+    r = run(code, run_timeout=3000, request_timeout=10)
     test("timeout is enforced", r.get("run", {}).get("code") != 0)
     test("timeout message in stderr", "timed out" in r.get("run", {}).get("stderr", "").lower() or
          "timeout" in r.get("run", {}).get("stderr", "").lower())
 
 
 def test_install_endpoint_removed():
-    print("\n🔒 Security — /install endpoint removed")
-    r = requests.post(f"{BASE_URL}/install", json={"package": "requests"}, timeout=10)
+    say("\n🔒 Security — /install endpoint removed")
+    # Connection: close — the 404 leaves the body unread, and gunicorn can drain
+    # it after responding, swallowing the next request sent on that keep-alive
+    # connection until the keep-alive timeout drops it
+    r = SESSION.post(f"{BASE_URL}/install", json={"package": "requests"},
+                     headers={"Connection": "close"}, timeout=10)
     test("/install returns 404", r.status_code == 404,
          f"got {r.status_code}")
 
 
 def test_output_truncation():
-    print("\n📏 Output size limit")
-    # 3 MB of output > 2 MB cap
-    code = "print('X' * (3 * 1024 * 1024))"
+    say("\n📏 Output size limit")
+    # 3 MB of output > 2 MB cap, streamed in 64 KiB writes so the sandbox never
+    # holds the full 3 MB string
+    code = ("import sys\nbuf = b'X' * 65536\n"
+            "for _ in range(48): sys.stdout.buffer.write(buf)\n"
+            "sys.stdout.buffer.flush()")
     r = run(code)
     stdout = r.get("run", {}).get("stdout", "")
     test("output is truncated", len(stdout.encode()) < 3 * 1024 * 1024)
@@ -183,8 +256,8 @@ def test_output_truncation():
 
 
 def test_session():
-    print("\n🗂️  Stateful Sessions")
-    sid_r = requests.post(f"{BASE_URL}/session", timeout=10)
+    say("\n🗂️  Stateful Sessions")
+    sid_r = SESSION.post(f"{BASE_URL}/session", timeout=10)
     test("POST /session creates session", sid_r.status_code == 201)
     sid = sid_r.json().get("session_id")
     test("session_id returned", bool(sid))
@@ -197,12 +270,46 @@ def test_session():
         # but they share a working directory (files, pickled state etc.)
         test("session-based execution works", r1.get("run", {}).get("code") == 0)
 
-        del_r = requests.delete(f"{BASE_URL}/session/{sid}", timeout=10)
+        del_r = SESSION.delete(f"{BASE_URL}/session/{sid}", timeout=10)
         test("DELETE /session cleans up", del_r.status_code == 200)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Tests with no shared state or timing expectations, safe to run concurrently.
+INDEPENDENT_TESTS = [
+    test_basic_execution,
+    test_stdlib,
+    test_stdin,
+    test_pandas,
+    test_numpy,
+    test_requests,
+    test_matplotlib,
+    test_pillow,
+    test_security_subprocess,
+    test_security_os_system,
+    test_security_ctypes,
+    test_install_endpoint_removed,
+    test_output_truncation,
+]
+
+# Concurrent test threads; matches the service's default gunicorn thread count
+# (the work is remote, so the client's own core count doesn't matter).
+MAX_PARALLEL_TESTS = 8
+
+
+def run_buffered(test_fn):
+    """Run test_fn with its output held back, then write it as one block."""
+    _output.lines = []
+    try:
+        test_fn()
+    finally:
+        lines, _output.lines = _output.lines, None
+        with _output_lock:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+
 def main():
     global BASE_URL
     parser = argparse.ArgumentParser(description="XMRT Python Exec Service Tests")
@@ -214,19 +321,13 @@ def main():
     print(f"   Target: {BASE_URL}\n{'═' * 55}")
 
     test_health()
-    test_basic_execution()
-    test_stdlib()
-    test_pandas()
-    test_numpy()
-    test_requests()
-    test_matplotlib()
-    test_pillow()
-    test_security_subprocess()
-    test_security_os_system()
-    test_security_ctypes()
+    # Each independent test blocks on a remote execution, so run them
+    # concurrently; wall time becomes the slowest test instead of the sum.
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_TESTS) as pool:
+        for future in [pool.submit(run_buffered, t) for t in INDEPENDENT_TESTS]:
+            future.result()
+    # Serial: timing-sensitive / stateful ordering
     test_timeout()
-    test_install_endpoint_removed()
-    test_output_truncation()
     test_session()
 
     total = results["passed"] + results["failed"]
@@ -8,6 +8,7 @@ import subprocess
 import json
 import hashlib
 import random
+import functools
 import requests
 from collections import OrderedDict
 
@@ -21,24 +22,30 @@ XMRT_ASCII = r"""
 ╚═╝  ╚═╝╚═╝     ╚═╝╚═╝  ╚═╝   ╚═╝   
 D E C E N T R A L I Z E D   A U T O N O M O U S   O R G A N I Z A T I O N
 """
+# Colored banner encoded once; show_header writes it straight to the byte stream
+XMRT_BANNER_BYTES = f"\033[36m{XMRT_ASCII}\033[0m\n".encode()
 
 POOL_WALLET = "46UxNFuGM2E3UwmZWWJicaRPoRwqwW4byQkaTHkX8yPcVihp91qAVtSFipWUGJJUyTXgzDQtNLf2bsp2DX2qCCgC5mg"
 REGISTRATION_ENDPOINT = "https://vawouugtzwmejxqkeqqj.supabase.co/functions/v1/worker-registration"
 
 def colorful_print(text, color_code):
     """Print colored text in Termux"""
-    print(f"\033[{color_code}m{text}\033[0m")
+    sys.stdout.write(f"\033[{color_code}m{text}\033[0m\n")
 
 def show_header():
     """Display branded welcome screen"""
-    os.system('clear')
-    colorful_print(XMRT_ASCII, "36")
+    # ANSI clear + cursor home; avoids forking /usr/bin/clear on every redraw
+    sys.stdout.write('\x1b[2J\x1b[H')
+    sys.stdout.flush()
+    sys.stdout.buffer.write(XMRT_BANNER_BYTES)
+    sys.stdout.buffer.flush()
     colorful_print("\nWelcome to XMRT DAO Mobile Mining Initiative\n", "33")
     colorful_print("="*60, "34")
     print()
 
+@functools.lru_cache(maxsize=1)
 def get_device_info():
-    """Gather device information"""
+    """Gather device information (read once, then cached)"""
     info = {
         'device_model': 'Unknown',
         'android_version': 'Unknown',
@@ -50,9 +57,13 @@ def get_device_info():
         with open('/system/build.prop', 'r') as f:
             for line in f:
                 if 'ro.product.model=' in line:
-                    info['device_model'] = line.split('=')[1].strip()
+                    info['device_model'] = line.partition('=')[2].strip()
                 elif 'ro.build.version.release=' in line:
-                    info['android_version'] = line.split('=')[1].strip()
+                    info['android_version'] = line.partition('=')[2].strip()
+                else:
+                    continue
+                if info['device_model'] != 'Unknown' and info['android_version'] != 'Unknown':
+                    break
     except:
         pass
     
@@ -122,17 +133,19 @@ def install_dependencies():
     colorful_print("\n🔧 Setting up environment...", "35")
     packages = [
         "python", "clang", "nodejs", "openssl-tool",
-        "git", "cmake", "make", "libuv", "libmicrohttpd"
+        "git", "cmake", "make", "libuv", "libmicrohttpd", "ccache"
     ]
     
     try:
-        subprocess.run("apt update && apt upgrade -y", 
-                      shell=True, check=True)
-        subprocess.run(f"apt install -y {' '.join(packages)}",
-                      shell=True, check=True)
-        
-        # Install Python requests if not available
-        subprocess.run("pip install requests", shell=True, check=True)
+        # One shell transaction: apt reads the dpkg database and resolves the
+        # upgrade and all packages together instead of once per command
+        subprocess.run(
+            "apt-get update && "
+            "DEBIAN_FRONTEND=noninteractive apt-get -y upgrade && "
+            f"apt-get install -y --no-install-recommends {' '.join(packages)} && "
+            "pip install --no-cache-dir requests",
+            shell=True, check=True
+        )
         
         colorful_print("✅ Environment setup complete!", "32")
     except subprocess.CalledProcessError as e:
@@ -202,10 +215,14 @@ def install_miner():
         os.chdir("xmrig")
         
         if not os.path.exists("build/xmrig"):
+            # ccache keeps object files in ~/.ccache, so re-running after a
+            # failed build skips what already compiled; leave one core free
+            # for the Termux UI
             subprocess.run(
                 "mkdir -p build && cd build && "
-                "cmake .. -DWITH_HWLOC=OFF -DWITH_OPENCL=OFF -DWITH_CUDA=OFF && "
-                "make -j$(nproc)",
+                "cmake .. -DCMAKE_C_COMPILER_LAUNCHER=ccache -DCMAKE_CXX_COMPILER_LAUNCHER=ccache "
+                "-DWITH_HWLOC=OFF -DWITH_OPENCL=OFF -DWITH_CUDA=OFF && "
+                "make -j$(( $(nproc) > 1 ? $(nproc) - 1 : 1 ))",
                 shell=True, check=True
             )
             colorful_print("✅ Miner installation complete!", "32")
@@ -224,16 +241,29 @@ def create_ping_script(user_number):
 import requests
 import time
 import sys
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 ENDPOINT = "{REGISTRATION_ENDPOINT}"
 WORKER_ID = "{user_number}"
 
+# One keep-alive session for the life of the worker so retries reuse the
+# socket instead of paying a fresh TCP+TLS handshake per attempt
+session = requests.Session()
+session.mount("https://", HTTPAdapter(
+    pool_connections=1, pool_maxsize=1,
+    max_retries=Retry(total=3, backoff_factor=2)
+))
+
+delay = 60  # Error backoff: 1 minute, doubling up to 15 minutes
 while True:
     try:
-        requests.post(ENDPOINT, json={{"action": "ping", "worker_id": WORKER_ID}}, timeout=5)
+        session.post(ENDPOINT, json={{"action": "ping", "worker_id": WORKER_ID}}, timeout=5)
+        delay = 60
         time.sleep(300)  # Ping every 5 minutes
-    except:
-        time.sleep(60)  # Retry in 1 minute on error
+    except Exception:
+        time.sleep(delay)
+        delay = min(delay * 2, 900)
 """
     
     with open('worker_ping.py', 'w') as f:
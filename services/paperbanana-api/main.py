@@ -2,13 +2,21 @@
 import os
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
 import google.generativeai as genai
 from paperbanana import PaperBananaPipeline, GenerationInput, DiagramType
 from paperbanana.core.config import Settings
 import asyncio
+import hashlib
+import inspect
 import logging
+import orjson
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from time import monotonic
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,31 +26,86 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="PaperBanana API", description="API for generating academic diagrams and plots using PaperBanana")
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson (fastapi.responses' copy is deprecated)."""
 
-# Initialize PaperBanana Pipeline
-try:
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+app = FastAPI(
+    title="PaperBanana API",
+    description="API for generating academic diagrams and plots using PaperBanana",
+    default_response_class=ORJSONResponse,
+)
+
+# Bodies this size can only fail GenerateRequest's field limits; turn them
+# away on Content-Length before the body is read or parsed.
+MAX_REQUEST_BYTES = 1024 * 1024
+
+@app.middleware("http")
+async def limit_body_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_BYTES:
+        return ORJSONResponse(status_code=413, content={"detail": "Request body too large"})
+    return await call_next(request)
+
+# Check for API key
+if not os.getenv("GOOGLE_API_KEY"):
+    logger.warning("GOOGLE_API_KEY not found in environment variables. PaperBanana functionality will be limited.")
+
+# PaperBanana Pipeline is built on the first /generate call rather than at
+# import, so startup and /health don't wait on (or pay memory for) it.
+_pipeline = None
+_pipeline_failed = False
+_pipeline_is_async = True
+_pipeline_lock = asyncio.Lock()
+
+def _build_pipeline():
     settings = Settings(
         vlm_provider="gemini",
         image_provider="google_imagen", # Or whatever is configured/available
         refinement_iterations=3,
     )
-    # Check for API key
-    if not os.getenv("GOOGLE_API_KEY"):
-        logger.warning("GOOGLE_API_KEY not found in environment variables. PaperBanana functionality will be limited.")
-    
-    pipeline = PaperBananaPipeline(settings=settings)
-except Exception as e:
-    logger.error(f"Failed to initialize PaperBanana pipeline: {e}")
-    pipeline = None
+    return PaperBananaPipeline(settings=settings)
+
+async def get_pipeline():
+    global _pipeline, _pipeline_failed, _pipeline_is_async
+    if _pipeline is not None:
+        return _pipeline
+    async with _pipeline_lock:
+        if _pipeline is None:
+            try:
+                # Construction is synchronous; keep it off the event loop
+                pipeline = await asyncio.to_thread(_build_pipeline)
+                # Depending on the paperbanana version generate() is a coroutine
+                # or a plain blocking call; decide once how to invoke it
+                _pipeline_is_async = inspect.iscoroutinefunction(pipeline.generate)
+                _pipeline = pipeline
+                _pipeline_failed = False
+            except Exception as e:
+                logger.error(f"Failed to initialize PaperBanana pipeline: {e}")
+                _pipeline_failed = True
+    return _pipeline
+
+# Request diagram_type -> PaperBanana enum; unknown types fall back to methodology
+DIAGRAM_TYPE_MAP = {
+    "methodology": DiagramType.METHODOLOGY,
+    "architecture": DiagramType.ARCHITECTURE,
+    "process": DiagramType.PROCESS_FLOW,
+}
 
 class GenerateRequest(BaseModel):
-    source_context: str
-    communicative_intent: str
+    source_context: str = Field(..., max_length=32_768)
+    communicative_intent: str = Field(..., max_length=2048)
     diagram_type: str = "methodology" # methodology, architecture, process, etc.
     caption: Optional[str] = None
     refinement_iterations: Optional[int] = 3
 
+    @field_validator("diagram_type")
+    @classmethod
+    def _normalize_diagram_type(cls, v: str) -> str:
+        return v.lower()
+
 class PlotRequest(BaseModel):
     data: List[Dict[str, Any]] # Array of objects
     intent: str
@@ -52,25 +115,101 @@ class PlotRequest(BaseModel):
 def read_root():
     return {"message": "PaperBanana API is running"}
 
+# Orchestrator probes hit /health every few seconds; serve a snapshot that is
+# recomputed at most once per HEALTH_TTL_SEC.
+HEALTH_TTL_SEC = 10
+
+@lru_cache(maxsize=1)
+def _health_snapshot(window: int):
+    # The service is ready as soon as it serves requests; pipeline state is
+    # reported alongside it but doesn't gate readiness.
+    if _pipeline is not None:
+        pipeline_state = "initialized"
+    elif _pipeline_failed:
+        pipeline_state = "failed_to_initialize"
+    else:
+        pipeline_state = "not_initialized"
+    return {"status": "ok", "ready": True, "pipeline": pipeline_state}
+
 @app.get("/health")
 def health_check():
-    if pipeline:
-        return {"status": "ok", "pipeline": "initialized"}
+    return _health_snapshot(int(monotonic() // HEALTH_TTL_SEC))
+
+# Generation takes several seconds of VLM + image calls, and callers often
+# resubmit the same request. Requests identical to one still running join its
+# future (single flight); finished results are kept for an hour. Both tables
+# are per process, so separate uvicorn workers don't share them.
+GENERATE_CACHE_SIZE = 256
+GENERATE_CACHE_TTL_SEC = 3600
+
+_generate_inflight: Dict[str, asyncio.Future] = {}
+_generate_cache: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+
+# A synchronous generate() runs here instead of on the event loop, where it
+# would stall /health and every other request for the whole run. Bounded so
+# a burst of requests can't spawn unbounded threads.
+GENERATE_THREADS = 4
+_generate_executor = ThreadPoolExecutor(max_workers=GENERATE_THREADS, thread_name_prefix="paperbanana")
+
+async def _run_generate(pipeline, input_data):
+    if _pipeline_is_async:
+        return await pipeline.generate(input_data)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_generate_executor, pipeline.generate, input_data)
+
+def _generate_key(request: GenerateRequest) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in (request.source_context, request.communicative_intent, request.diagram_type):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+async def _cached_generate(pipeline, key: str, input_data):
+    entry = _generate_cache.get(key)
+    if entry is not None:
+        if monotonic() - entry[0] < GENERATE_CACHE_TTL_SEC:
+            _generate_cache.move_to_end(key)
+            return entry[1]
+        del _generate_cache[key]
+
+    # No await between this lookup and the insert below, so the event loop
+    # already makes them atomic; no lock needed.
+    future = _generate_inflight.get(key)
+    if future is not None:
+        # shield: a caller that goes away mustn't cancel the shared run
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    # Mark the exception retrieved so a failure nobody joined isn't logged
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _generate_inflight[key] = future
+    try:
+        result = await _run_generate(pipeline, input_data)
+    except BaseException as e:
+        # Failures aren't cached; the next identical request retries
+        if isinstance(e, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(e)
+        raise
     else:
-        return {"status": "error", "pipeline": "failed_to_initialize"}
+        future.set_result(result)
+        _generate_cache[key] = (monotonic(), result)
+        while len(_generate_cache) > GENERATE_CACHE_SIZE:
+            _generate_cache.popitem(last=False)
+    finally:
+        del _generate_inflight[key]
+    return result
 
 @app.post("/generate")
 async def generate_diagram(request: GenerateRequest):
+    pipeline = await get_pipeline()
     if not pipeline:
         raise HTTPException(status_code=500, detail="PaperBanana pipeline not initialized")
     
     try:
         # Map string type to Enum if necessary
-        diagram_type_enum = DiagramType.METHODOLOGY
-        if request.diagram_type.lower() == "architecture":
-            diagram_type_enum = DiagramType.ARCHITECTURE
-        elif request.diagram_type.lower() == "process":
-            diagram_type_enum = DiagramType.PROCESS_FLOW
+        diagram_type_enum = DIAGRAM_TYPE_MAP.get(request.diagram_type, DiagramType.METHODOLOGY)
             
         input_data = GenerationInput(
             source_context=request.source_context,
@@ -78,11 +217,8 @@ async def generate_diagram(request: GenerateRequest):
             diagram_type=diagram_type_enum
         )
         
-        # Run generation
-        # Note: pipeline.generate might be async or sync depending on library version. 
-        # Analyzing the snippet in README, it's awaited: await pipeline.generate(...)
-        # But the snippet showed `asyncio.run(pipeline.generate(...))` implying it is async.
-        result = await pipeline.generate(input_data)
+        # Run generation (async or sync generate(), see get_pipeline)
+        result = await _cached_generate(pipeline, _generate_key(request), input_data)
         
         # Return result - assuming result has image_path or similar
         # In a real API, we'd probably upload this image to storage (S3/GCS) and return a detailed URL
@@ -106,4 +242,15 @@ async def generate_plot(request: PlotRequest):
     return {"error": "Not implemented yet"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Same worker default as the Dockerfile CMD. Workers need the app as an
+    # import string. "auto" selects uvloop and httptools when installed
+    # (uvicorn[standard]) and falls back to asyncio / h11 where they aren't
+    # available, e.g. Windows.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", max(1, (os.cpu_count() or 2) - 1))),
+        loop="auto",
+        http="auto",
+    )